@@ -48,4 +48,7 @@ setuptools.setup(
         "streamdeck python sdk"
     ],
     install_requires=requirements,
+    extras_require={
+        "uvloop": ["uvloop>=0.17.0; sys_platform != 'win32'"],
+    },
 )
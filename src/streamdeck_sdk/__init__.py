@@ -1,5 +1,14 @@
 from . import mixins
-from .sd_objs import events_received_objs, events_sent_objs, registration_objs
+from .sd_objs import events_received_objs, registration_objs
 from .logger import logger, log_errors
 from .sdk import StreamDeck, Action
 from .utils import image_file_to_base64, image_bytes_to_base64, in_separate_thread
+
+
+def __getattr__(name: str):
+    # Imported on first use, see sd_objs.__getattr__
+    if name == "events_sent_objs":
+        from .sd_objs import events_sent_objs
+        globals()[name] = events_sent_objs
+        return events_sent_objs
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,9 +1,10 @@
 from enum import Enum
-from typing import Type, Dict, get_type_hints
+from typing import Callable, Type, Dict, Tuple, get_type_hints
 
 from pydantic import BaseModel
 
 from . import mixins
+from .pydantic_compat import model_validator
 
 
 class EventRoutingObjTypes(Enum):
@@ -18,10 +19,19 @@ class EventRoutingObj(BaseModel):
 
 
 EVENT_ROUTING_MAP: Dict[str, EventRoutingObj] = {}
+EVENT_DECODERS: Dict[str, Callable[[dict], BaseModel]] = {}
+
+# Indexes into StreamDeck._dispatchers
+DISPATCH_KIND_ACTION = 0
+DISPATCH_KIND_PLUGIN = 1
+
+# Everything ws_on_message needs for an event, in a single lookup
+EVENT_DISPATCH: Dict[str, Tuple[EventRoutingObj, Callable[[dict], BaseModel], int]] = {}
 
 
 def fill_routing_map(
         routing_map: Dict[str, EventRoutingObj],
+        decoder_map: Dict[str, Callable[[dict], BaseModel]],
         event_handler_mixin: mixins.BaseEventHandlerMixin,
         event_routing_obj_type: EventRoutingObjTypes,
 ) -> None:
@@ -43,6 +53,7 @@ def fill_routing_map(
             obj_type=obj_type,
             type=event_routing_obj_type,
         )
+        decoder_map[event_name] = model_validator(obj_type)
 
 
 def fill_event_routing_map() -> None:
@@ -52,9 +63,20 @@ def fill_event_routing_map() -> None:
     ):
         fill_routing_map(
             routing_map=EVENT_ROUTING_MAP,
+            decoder_map=EVENT_DECODERS,
             event_handler_mixin=event_handler_mixin,
             event_routing_obj_type=event_routing_obj_type,
         )
 
 
+def fill_event_dispatch_map() -> None:
+    for event_name, event_routing in EVENT_ROUTING_MAP.items():
+        if event_routing.type is EventRoutingObjTypes.ACTION:
+            dispatch_kind = DISPATCH_KIND_ACTION
+        else:
+            dispatch_kind = DISPATCH_KIND_PLUGIN
+        EVENT_DISPATCH[event_name] = (event_routing, EVENT_DECODERS[event_name], dispatch_kind)
+
+
 fill_event_routing_map()
+fill_event_dispatch_map()
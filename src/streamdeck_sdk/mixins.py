@@ -1,193 +1,210 @@
-import json
-from typing import Union
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Union
 
+import orjson
 import pydantic
 import websocket
 from websocket import ABNF
 
-from .sd_objs import events_received_objs, events_sent_objs
+from .sd_objs import events_received_objs
 from .logger import log_errors
+from .pydantic_compat import model_to_json
+from .utils import SendBatcher
+
+if TYPE_CHECKING:
+    # Only needed for annotations; the helpers below serialize their messages directly
+    from .sd_objs import events_sent_objs
+
+
+@lru_cache(maxsize=1024)
+def _no_payload_event(event: str, context: str) -> bytes:
+    """
+    Serialized message for events that carry nothing but a context.
+    """
+    return orjson.dumps({"event": event, "context": context})
+
+
+def _event_prefix(event: str) -> bytes:
+    return b'{"event":' + orjson.dumps(event) + b',"context":'
+
+
+_SET_GLOBAL_SETTINGS_PREFIX = _event_prefix("setGlobalSettings")
+_SET_SETTINGS_PREFIX = _event_prefix("setSettings")
+_SET_TITLE_PREFIX = _event_prefix("setTitle")
+_SET_IMAGE_PREFIX = _event_prefix("setImage")
+_SET_FEEDBACK_PREFIX = _event_prefix("setFeedback")
+_SET_FEEDBACK_LAYOUT_PREFIX = _event_prefix("setFeedbackLayout")
+_SET_STATE_PREFIX = _event_prefix("setState")
+
+
+def _context_payload_event(
+        prefix: bytes,
+        context: str,
+        payload: Union[pydantic.BaseModel, dict],
+) -> bytes:
+    """
+    Serialized message for events that carry a context and a payload.
+    The payload is written as is, without building a model around it.
+    """
+    if isinstance(payload, pydantic.BaseModel):
+        payload_json = model_to_json(payload)
+    else:
+        payload_json = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return b"".join((prefix, orjson.dumps(context), b',"payload":', payload_json, b"}"))
 
 
 class SendMixin:
+    __slots__ = ()
+
     ws: websocket.WebSocketApp
+    send_batcher: Optional[SendBatcher] = None
 
 #    @log_errors
     @classmethod
     def send(
-            self,
-            data: Union[pydantic.BaseModel, dict, str],
+            cls,
+            data: Union[pydantic.BaseModel, dict, str, bytes],
             opcode=ABNF.OPCODE_TEXT,
     ) -> None:
-        if isinstance(data, pydantic.BaseModel):
-            data = data.json(ensure_ascii=False)
+        """
+        Sends a message. Everything is turned into UTF-8 bytes here;
+        bytes, which is what the helpers produce, go out untouched.
+        """
+        if isinstance(data, bytes):
+            pass
+        elif isinstance(data, pydantic.BaseModel):
+            data = model_to_json(data)
         elif isinstance(data, dict):
-            data = json.dumps(data, ensure_ascii=False)
-        self.ws.send(data, opcode)
+            # User payloads may have non-str keys, which json.dumps used to coerce
+            data = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        else:
+            data = data.encode("utf-8")
+        if cls.send_batcher is not None:
+            cls.send_batcher.put(data, opcode)
+        else:
+            cls.ws.send(data, opcode)
+
+    @classmethod
+    def flush(cls) -> None:
+        """
+        Writes out the messages held back by send batching, if it is enabled.
+        """
+        if cls.send_batcher is not None:
+            cls.send_batcher.flush()
 
 
 class BaseEventSendMixin(SendMixin):
-    pass
+    __slots__ = ()
 
 
 class PluginEventsSendMixin(BaseEventSendMixin):
+    __slots__ = ()
+
     plugin_uuid: str
 
     @classmethod
-    def set_global_settings(self, payload: dict) -> None:
-        message = events_sent_objs.SetGlobalSettings(
-            context=self.plugin_uuid,
-            payload=payload,
-        )
-        self.send(message)
+    def set_global_settings(cls, payload: dict) -> None:
+        cls.send(_context_payload_event(_SET_GLOBAL_SETTINGS_PREFIX, cls.plugin_uuid, payload))
 
     @classmethod
-    def get_global_settings(self) -> None:
-        message = events_sent_objs.GetGlobalSettings(
-            context=self.plugin_uuid,
-        )
-        self.send(message)
+    def get_global_settings(cls) -> None:
+        cls.send(_no_payload_event("getGlobalSettings", cls.plugin_uuid))
 
     @classmethod
-    def open_url(self, url: str) -> None:
-        message = events_sent_objs.OpenUrl(
-            payload=events_sent_objs.OpenUrlPayload(
-                url=url,
-            ),
-        )
-        self.send(message)
+    def open_url(cls, url: str) -> None:
+        cls.send({"event": "openUrl", "payload": {"url": url}})
 
     @classmethod
-    def log_message(self, message: str) -> None:
-        message = events_sent_objs.LogMessage(
-            payload=events_sent_objs.LogMessagePayload(
-                message=message,
-            ),
-        )
-        self.send(message)
+    def log_message(cls, message: str) -> None:
+        cls.send({"event": "logMessage", "payload": {"message": message}})
 
     @classmethod
     def switch_to_profile(
-            self,
+            cls,
             device: str,
             profile: str,
     ) -> None:
-        message = events_sent_objs.SwitchToProfile(
-            context=self.plugin_uuid,
-            device=device,
-            payload=events_sent_objs.SwitchToProfilePayload(
-                profile=profile,
-            ),
-        )
-        self.send(message)
+        cls.send({
+            "event": "switchToProfile",
+            "context": cls.plugin_uuid,
+            "device": device,
+            "payload": {"profile": profile},
+        })
 
 
 class ActionEventsSendMixin(BaseEventSendMixin):
+    __slots__ = ()
+
     def set_settings(
             self,
             payload: dict,
     ) -> None:
-        message = events_sent_objs.SetSettings(
-            context=self.context,
-            payload=payload,
-        )
-        self.send(message)
+        self.send(_context_payload_event(_SET_SETTINGS_PREFIX, self.context, payload))
 
     def get_settings(
             self,
     ) -> None:
-        message = events_sent_objs.GetSettings(
-            context=self.context,
-        )
-        self.send(message)
+        self.send(_no_payload_event("getSettings", self.context))
 
     def set_title(
             self,
-            payload: events_sent_objs.SetTitlePayload,
+            payload: Union["events_sent_objs.SetTitlePayload", dict],
     ) -> None:
-        message = events_sent_objs.SetTitle(
-            context=self.context,
-            payload=payload,
-        )
-        self.send(message)
+        self.send(_context_payload_event(_SET_TITLE_PREFIX, self.context, payload))
 
     def set_image(
             self,
-            payload: events_sent_objs.SetImagePayload,
+            payload: Union["events_sent_objs.SetImagePayload", dict],
     ) -> None:
-        message = events_sent_objs.SetImage(
-            context=self.context,
-            payload=payload,
-        )
-        self.send(message)
+        self.send(_context_payload_event(_SET_IMAGE_PREFIX, self.context, payload))
 
     def set_feedback(
             self,
             payload: dict,
     ) -> None:
-        message = events_sent_objs.SetFeedback(
-            context=self.context,
-            payload=payload,
-        )
-        self.send(message)
+        self.send(_context_payload_event(_SET_FEEDBACK_PREFIX, self.context, payload))
 
     def set_feedback_layout(
             self,
             layout: str,
     ) -> None:
-        message = events_sent_objs.SetFeedbackLayout(
-            context=self.context,
-            payload=events_sent_objs.SetFeedbackLayoutPayload(
-                layout=layout
-            ),
-        )
-        self.send(message)
+        self.send(_context_payload_event(_SET_FEEDBACK_LAYOUT_PREFIX, self.context, {"layout": layout}))
 
     def show_alert(
             self,
     ) -> None:
-        message = events_sent_objs.ShowAlert(
-            context=self.context,
-        )
-        self.send(message)
+        self.send(_no_payload_event("showAlert", self.context))
 
     def show_ok(
             self,
     ) -> None:
-        message = events_sent_objs.ShowOk(
-            context=self.context,
-        )
-        self.send(message)
+        self.send(_no_payload_event("showOk", self.context))
 
     def set_state(
             self,
             state: int,
     ) -> None:
-        message = events_sent_objs.SetState(
-            context=self.context,
-            payload=events_sent_objs.SetStatePayload(
-                state=state
-            )
-        )
-        self.send(message)
+        self.send(_context_payload_event(_SET_STATE_PREFIX, self.context, {"state": state}))
 
     def send_to_property_inspector(
             self,
             payload: dict,
     ):
-        message = events_sent_objs.SendToPropertyInspector(
-            action=self.UUID,
-            context=self.context,
-            payload=payload
-        )
-        self.send(message)
+        self.send({
+            "event": "sendToPropertyInspector",
+            "action": self.UUID,
+            "context": self.context,
+            "payload": payload,
+        })
 
 
 class BaseEventHandlerMixin:
-    pass
+    __slots__ = ()
 
 
 class ActionEventHandlersMixin(BaseEventHandlerMixin):
+    __slots__ = ()
+
     def on_did_receive_settings(self, obj: events_received_objs.DidReceiveSettings) -> None:
         pass
 
@@ -235,26 +252,28 @@ class ActionEventHandlersMixin(BaseEventHandlerMixin):
 
 
 class PluginEventHandlersMixin(BaseEventHandlerMixin):
+    __slots__ = ()
+
     @classmethod
-    def on_did_receive_global_settings(self, obj: events_received_objs.DidReceiveGlobalSettings) -> None:
+    def on_did_receive_global_settings(cls, obj: events_received_objs.DidReceiveGlobalSettings) -> None:
         pass
 
     @classmethod
-    def on_device_did_connect(self, obj: events_received_objs.DeviceDidConnect) -> None:
+    def on_device_did_connect(cls, obj: events_received_objs.DeviceDidConnect) -> None:
         pass
 
     @classmethod
-    def on_device_did_disconnect(self, obj: events_received_objs.DeviceDidDisconnect) -> None:
+    def on_device_did_disconnect(cls, obj: events_received_objs.DeviceDidDisconnect) -> None:
         pass
 
     @classmethod
-    def on_application_did_launch(self, obj: events_received_objs.ApplicationDidLaunch) -> None:
+    def on_application_did_launch(cls, obj: events_received_objs.ApplicationDidLaunch) -> None:
         pass
 
     @classmethod
-    def on_application_did_terminate(self, obj: events_received_objs.ApplicationDidTerminate) -> None:
+    def on_application_did_terminate(cls, obj: events_received_objs.ApplicationDidTerminate) -> None:
         pass
 
     @classmethod
-    def on_system_did_wake_up(self, obj: events_received_objs.SystemDidWakeUp) -> None:
+    def on_system_did_wake_up(cls, obj: events_received_objs.SystemDidWakeUp) -> None:
         pass
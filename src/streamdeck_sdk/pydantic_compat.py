@@ -0,0 +1,25 @@
+from typing import Callable, Type
+
+import orjson
+import pydantic
+from pydantic import BaseModel
+
+PYDANTIC_V2: bool = int(pydantic.VERSION.split(".")[0]) >= 2
+
+if PYDANTIC_V2:
+    def model_to_json(model: BaseModel) -> bytes:
+        # Serialized by pydantic-core, keyed by field name as under pydantic 1
+        return model.model_dump_json().encode("utf-8")
+
+    def model_validator(model_type: Type[BaseModel]) -> Callable[[dict], BaseModel]:
+        # parse_obj is a deprecated shim in pydantic 2 that warns on every call
+        return model_type.model_validate
+
+else:
+    def model_to_json(model: BaseModel) -> bytes:
+        # BaseModel.json() goes through the stdlib json module; the model's encoder
+        # covers what orjson does not (sets, Decimal, Path, custom json_encoders)
+        return orjson.dumps(model.dict(), default=model.__json_encoder__, option=orjson.OPT_NON_STR_KEYS)
+
+    def model_validator(model_type: Type[BaseModel]) -> Callable[[dict], BaseModel]:
+        return model_type.parse_obj
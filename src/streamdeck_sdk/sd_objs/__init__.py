@@ -1,3 +1,13 @@
+import importlib
+
 from . import events_received_objs
-from . import events_sent_objs
 from . import registration_objs
+
+
+def __getattr__(name: str):
+    # The outgoing models are only imported by plugins that build messages from them
+    if name == "events_sent_objs":
+        module = importlib.import_module(f".{name}", __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
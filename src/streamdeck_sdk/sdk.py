@@ -1,9 +1,9 @@
-import argparse
-import json
 import logging
+import sys
 from pathlib import Path
-from typing import Optional, Callable, List, Dict
+from typing import Any, Optional, Callable, List, Dict, Set, Tuple, Union
 
+import orjson
 import pydantic
 import websocket
 
@@ -14,7 +14,9 @@ from .logger import (
     log_errors,
     rename_plugin_logger,
 )
+from .pydantic_compat import model_validator
 from .sd_objs import registration_objs
+from .utils import SendBatcher
 
 
 class Base(
@@ -24,13 +26,91 @@ class Base(
     mixins.ActionEventsSendMixin,
     mixins.SendMixin,
 ):
-    pass
+    __slots__ = ()
 
 
 logger = logging.getLogger(__name__)
 
+_REQUIRED_ARGS = ("-port", "-pluginUUID", "-registerEvent", "-info")
+
+
+def _parse_args(argv: List[str]) -> Dict[str, str]:
+    """
+    Stream Deck launches the plugin with flag/value pairs:
+    -port <port> -pluginUUID <uuid> -registerEvent <event> -info <json>
+    """
+    args = dict(zip(argv[::2], argv[1::2]))
+    missing = [name for name in _REQUIRED_ARGS if name not in args]
+    if missing:
+        raise SystemExit(f"StreamDeck Plugin: the following arguments are required: {', '.join(missing)}")
+    return args
+
+
+def _is_default_handler(handler: Optional[Callable], default_handler: Callable) -> bool:
+    # Bound methods and classmethods are compared by their underlying function
+    if handler is None:
+        return True
+    return getattr(handler, "__func__", handler) is getattr(default_handler, "__func__", default_handler)
+
+
+def _class_attribute(cls: type, name: str) -> Optional[Any]:
+    """
+    The attribute as stored in the class namespace, before any binding,
+    so that it can be bound to each instance the way getattr would.
+    """
+    for klass in cls.__mro__:
+        if name in klass.__dict__:
+            attribute = klass.__dict__[name]
+            if not hasattr(attribute, "__get__"):
+                attribute = staticmethod(attribute)
+            return attribute
+    return None
+
+
+def _make_router(
+        plugin_handler_router: Callable,
+        dispatchers: Tuple[Callable, Callable],
+        unhandled_events: Set[str],
+) -> Callable[[Union[str, bytes]], None]:
+    """
+    Builds the function that decodes an inbound frame and routes it to the handlers.
+    The tables and routers are bound once here instead of being looked up per frame.
+    """
+    event_dispatch = event_routings.EVENT_DISPATCH
+    loads = orjson.loads
+    is_enabled_for = logger.isEnabledFor
+
+    def route(message: Union[str, bytes]) -> None:
+        # The frame is parsed exactly once; the decoder validates the resulting dict
+        message_dict = loads(message)
+        debug = is_enabled_for(logging.DEBUG)
+        if debug:
+            logger.debug("message_dict=%r", message_dict)
+
+        event = message_dict["event"]
+        if event in unhandled_events:
+            return
+
+        dispatch = event_dispatch.get(event)
+        if dispatch is None:
+            logger.warning("event_routing is None")
+            return
+        event_routing, decoder, dispatch_kind = dispatch
+
+        obj = decoder(message_dict)
+        if debug:
+            logger.debug("obj=%r", obj)
+
+        plugin_handler_router(event_routing=event_routing, obj=obj)
+        dispatchers[dispatch_kind](event_routing=event_routing, obj=obj)
+
+    return route
+
 
 class Action(Base):
+    # ws, plugin_uuid and info are shared through the class, see StreamDeck.__init_actions
+    __slots__ = ("context",)
+
     UUID: str  # Required
 
     plugin_uuid: Optional[str] = None
@@ -44,6 +124,26 @@ class Action(Base):
 
 
 class StreamDeck(Base):
+    # ws, plugin_uuid and send_batcher are set on the class
+    __slots__ = (
+        "log_file",
+        "actions_list",
+        "actions",
+        "action_instances",
+        "_plugin_event_handlers",
+        "_action_handlers",
+        "_dispatchers",
+        "_unhandled_events",
+        "_route",
+        "port",
+        "register_event",
+        "info",
+        "registration_dict",
+        "_registration_bytes",
+        "send_batch_size",
+        "send_batch_delay",
+    )
+
     ws: Optional[websocket.WebSocketApp] = None
     plugin_uuid: Optional[str] = None
 
@@ -55,6 +155,8 @@ class StreamDeck(Base):
             log_level: int = logging.DEBUG,
             log_max_bytes: int = 3 * 1024 * 1024,  # 3 MB
             log_backup_count: int = 2,
+            send_batch_size: Optional[int] = None,
+            send_batch_delay: float = 0.002,
     ):
         if log_file is not None:
             self.log_file: Path = Path(log_file)
@@ -69,12 +171,33 @@ class StreamDeck(Base):
         #XXX fill in the types
         self.actions = {}
         self.action_instances = {}
+        # Handlers resolved once in __init_actions
+        self._plugin_event_handlers: Dict[str, List[Callable]] = {}
+        # Unbound class attributes, bound to the per-context instance on dispatch
+        self._action_handlers: Dict[Tuple[str, str], Any] = {}
+        # Events that only reach the default no-op handlers are not decoded at all
+        self._unhandled_events: Set[str] = set()
+        # Indexed by event_routings.DISPATCH_KIND_*
+        self._dispatchers: Tuple[Callable, Callable] = (
+            self.route_action_event_in_action_handler,
+            self.route_plugin_event_in_action_handlers,
+        )
+        self._route: Callable[[Union[str, bytes]], None] = _make_router(
+            plugin_handler_router=self.route_event_in_plugin_handler,
+            dispatchers=self._dispatchers,
+            unhandled_events=self._unhandled_events,
+        )
 
         self.port: Optional[int] = None
         self.register_event: Optional[str] = None
         self.info: Optional[registration_objs.Info] = None
 
         self.registration_dict: Optional[dict] = None
+        self._registration_bytes: Optional[bytes] = None
+
+        # Send batching is off unless a batch size is given
+        self.send_batch_size = send_batch_size
+        self.send_batch_delay = send_batch_delay
 
     @log_errors
     def ws_on_open(
@@ -82,7 +205,8 @@ class StreamDeck(Base):
             ws: websocket.WebSocketApp,  # noqa
     ) -> None:
         logger.info("WS OPENED")
-        self.send(data=self.registration_dict)
+        # Written straight to the socket: registration has to precede anything batched
+        self.ws.send(self._registration_bytes, websocket.ABNF.OPCODE_TEXT)
 
     @log_errors
     def ws_on_close(
@@ -91,34 +215,24 @@ class StreamDeck(Base):
             close_status_code: int,
             close_msg: str,
     ) -> None:
-        logger.debug(f"{close_status_code=}; {close_msg=}")
-        logger.info(f"WS CLOSED")
+        logger.debug("close_status_code=%r; close_msg=%r", close_status_code, close_msg)
+        logger.info("WS CLOSED")
+        if self.send_batcher is not None:
+            self.send_batcher.close()
+            # Anything sent from here on goes straight to the connection
+            StreamDeck.send_batcher = None
+            for action in self.actions.values():
+                action.send_batcher = None
 
-    @log_errors
     def ws_on_message(
             self,
             ws: websocket.WebSocketApp,  # noqa
-            message: str,
+            message: Union[str, bytes],
     ) -> None:
-        message_dict = json.loads(message)
-        logger.debug(f"{message_dict=}")
-
-        event = message_dict["event"]
-        logger.debug(f"{event=}")
-
-        event_routing = event_routings.EVENT_ROUTING_MAP.get(event)
-        if event_routing is None:
-            logger.warning("event_routing is None")
-            return
-
-        obj = event_routing.obj_type.parse_obj(message_dict)
-        logger.debug(f"{obj=}")
-
-        self.route_event_in_plugin_handler(event_routing=event_routing, obj=obj)
-        if event_routing.type is event_routings.EventRoutingObjTypes.ACTION:
-            self.route_action_event_in_action_handler(event_routing=event_routing, obj=obj)
-        elif event_routing.type is event_routings.EventRoutingObjTypes.PLUGIN:
-            self.route_plugin_event_in_action_handlers(event_routing=event_routing, obj=obj)
+        try:
+            self._route(message)
+        except Exception as err:
+            logger.error(str(err), exc_info=True)
 
     @log_errors
     def ws_on_error(
@@ -128,7 +242,6 @@ class StreamDeck(Base):
     ) -> None:
         logger.error(f"{error=}")
 
-    @log_errors
     def route_event_in_plugin_handler(
             self,
             event_routing: event_routings.EventRoutingObj,
@@ -139,58 +252,43 @@ class StreamDeck(Base):
         except AttributeError as err:
             logger.error(f"Handler missing: {str(err)}", exc_info=True)
             return
-        handler(obj=obj)
+        try:
+            handler(obj=obj)
+        except Exception:
+            logger.error(f"bad handler: {handler=}", exc_info=True)
 
-    @log_errors
     def route_action_event_in_action_handler(
             self,
             event_routing: event_routings.EventRoutingObj,
             obj: pydantic.BaseModel,
     ) -> None:
-        try:
-            action_uuid = getattr(obj, "action")
-        except AttributeError as err:
-            logger.error(str(err), exc_info=True)
-            return
-
-        action_class = self.actions.get(action_uuid)
-        if action_class is None:
-            logger.warning(f"{action_uuid=} not registered")
+        # Every model routed here carries action and context
+        action_uuid = getattr(obj, "action", None)
+        handler = self._action_handlers.get((action_uuid, event_routing.handler_name))
+        if handler is None:
+            if action_uuid in self.actions:
+                logger.error("Handler missing: action_uuid=%r; handler_name=%r", action_uuid, event_routing.handler_name)
+            else:
+                logger.warning("action_uuid=%r not registered", action_uuid)
             return
 
-        try:
-            context = obj.context
-        except AttributeError as err:
-            logger.error(str(err), exec_info=True)
-            raise
-
-        action_instance = self.action_instances.get(context, None)
-        if not action_instance:
-            action_instance = action_class(context)
+        context = obj.context
+        action_instance = self.action_instances.get(context)
+        if action_instance is None:
+            action_instance = self.actions[action_uuid](context)
             self.action_instances[context] = action_instance
 
         try:
-            handler: Callable = getattr(action_instance, event_routing.handler_name)
-        except AttributeError as err:
-            logger.error(f"Handler missing: {str(err)}", exc_info=True)
-            return
-        try:
-            handler(obj=obj)
+            handler.__get__(action_instance, type(action_instance))(obj=obj)
         except Exception as exc:
             logger.error(f"bad handler: {handler=}", exc_info=True)
 
-    @log_errors
     def route_plugin_event_in_action_handlers(
             self,
             event_routing: event_routings.EventRoutingObj,
             obj: pydantic.BaseModel,
     ) -> None:
-        for action_obj in self.actions.values():
-            try:
-                handler: Callable = getattr(action_obj, event_routing.handler_name)
-            except AttributeError as err:
-                logger.error(f"Handler missing: {str(err)}", exc_info=True)
-                return
+        for handler in self._plugin_event_handlers.get(event_routing.handler_name, ()):
             try:
                 handler(obj=obj)
             except Exception as exc:
@@ -198,29 +296,24 @@ class StreamDeck(Base):
 
 
     def run(self, dispatcher=None) -> None:
-        logger.debug(f"Plugin has been launched")
-        parser = argparse.ArgumentParser(description='StreamDeck Plugin')
-        parser.add_argument('-port', dest='port', type=int, help="Port", required=True)
-        parser.add_argument('-pluginUUID', dest='pluginUUID', type=str, help="pluginUUID", required=True)
-        parser.add_argument('-registerEvent', dest='registerEvent', type=str, help="registerEvent", required=True)
-        parser.add_argument('-info', dest='info', type=str, help="info", required=True)
-
-        args = parser.parse_args()
-        logger.debug(f"{args=}")
-
-        self.port: int = args.port
-        logger.debug(f"{self.port=}")
-        StreamDeck.plugin_uuid: str = args.pluginUUID
-        logger.debug(f"{self.plugin_uuid=}")
-        self.register_event: str = args.registerEvent
-        logger.debug(f"{self.register_event=}")
-        self.info: registration_objs.Info = registration_objs.Info.parse_obj(json.loads(args.info))
-        logger.debug(f"{self.info=}")
+        logger.debug("Plugin has been launched")
+        args = _parse_args(sys.argv[1:])
+        logger.debug("args=%r", args)
+
+        self.port: int = int(args["-port"])
+        logger.debug("self.port=%r", self.port)
+        StreamDeck.plugin_uuid: str = args["-pluginUUID"]
+        logger.debug("self.plugin_uuid=%r", self.plugin_uuid)
+        self.register_event: str = args["-registerEvent"]
+        logger.debug("self.register_event=%r", self.register_event)
+        self.info: registration_objs.Info = model_validator(registration_objs.Info)(orjson.loads(args["-info"]))
+        logger.debug("self.info=%r", self.info)
 
         rename_plugin_logger(name=self.info.plugin.uuid)
 
         self.registration_dict = {"event": self.register_event, "uuid": self.plugin_uuid}
-        logger.debug(f"{self.registration_dict=}")
+        self._registration_bytes = orjson.dumps(self.registration_dict)
+        logger.debug("self.registration_dict=%r", self.registration_dict)
         # XXX need to tease apart the base classes here... Action wants send to be classmethod
         # XXX StreamDeck, not so much
         StreamDeck.ws = websocket.WebSocketApp(
@@ -230,15 +323,21 @@ class StreamDeck(Base):
             on_close=self.ws_on_close,
             on_open=self.ws_on_open,
         )
+        if self.send_batch_size is not None:
+            StreamDeck.send_batcher = SendBatcher(
+                ws=self.ws,
+                max_messages=self.send_batch_size,
+                max_delay=self.send_batch_delay,
+            )
         self.__init_actions()
         self.ws.run_forever(dispatcher=dispatcher)
+        if getattr(dispatcher, "dispatch_after_run_forever", False):
+            # run_forever only registers the connection with a custom dispatcher
+            dispatcher.dispatch()
 
 
     def __init_actions(self) -> None:
-        if self.actions_list is None:
-            return
-
-        for action in self.actions_list:
+        for action in self.actions_list or ():
             try:
                 action_uuid = action.UUID
             except AttributeError:
@@ -250,4 +349,34 @@ class StreamDeck(Base):
             action.plugin_uuid = self.plugin_uuid
             action.info = self.info
             action.ws = self.ws
+            action.send_batcher = self.send_batcher
             self.actions[action_uuid] = action
+
+        for event_name, event_routing in event_routings.EVENT_ROUTING_MAP.items():
+            handler_name = event_routing.handler_name
+            if event_routing.type is event_routings.EventRoutingObjTypes.PLUGIN:
+                default_handler = getattr(mixins.PluginEventHandlersMixin, handler_name)
+            else:
+                default_handler = getattr(mixins.ActionEventHandlersMixin, handler_name)
+            # willAppear always goes through while actions are registered:
+            # it is what fills action_instances for the visible keys
+            fills_instances = event_name == "willAppear" and bool(self.actions)
+            if not fills_instances and all(
+                    _is_default_handler(getattr(owner, handler_name, None), default_handler)
+                    for owner in (self, *self.actions.values())
+            ):
+                self._unhandled_events.add(event_name)
+
+            if event_routing.type is event_routings.EventRoutingObjTypes.PLUGIN:
+                # Plugin-wide events go to the action classes themselves
+                self._plugin_event_handlers[handler_name] = [
+                    handler for handler in (
+                        getattr(action, handler_name, None) for action in self.actions.values()
+                    ) if handler is not None
+                ]
+            else:
+                # Instances are created per context, so the handlers are kept unbound
+                for action_uuid, action in self.actions.items():
+                    handler = _class_attribute(action, handler_name)
+                    if handler is not None:
+                        self._action_handlers[(action_uuid, handler_name)] = handler
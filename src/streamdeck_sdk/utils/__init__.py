@@ -1,2 +1,3 @@
 from .image_converters import image_file_to_base64, image_bytes_to_base64
 from .in_separate_thread import in_separate_thread
+from .send_batcher import SendBatcher
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import socket
+from typing import Any, Callable, Optional, Union
+
+from .send_batcher import set_cork
+
+logger = logging.getLogger(__name__)
+
+
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    A uvloop event loop if uvloop is installed, otherwise a selector event loop,
+    which unlike the Windows default (proactor) can watch sockets for reading.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.SelectorEventLoop()
+    return uvloop.new_event_loop()
+
+
+class AsyncioDispatcher:
+    """
+    Dispatcher for websocket.WebSocketApp.run_forever that serves the connection
+    from an asyncio event loop instead of a blocking select() loop.
+
+    Inbound frames are read when the loop reports the socket readable. Where the
+    installed websocket-client hands writes to the dispatcher, outgoing frames from
+    any thread are written by the loop thread in the order they were sent; the socket
+    stays corked for the loop iteration, so frames sent together are coalesced.
+
+    Pass an instance to StreamDeck.run, which then runs the loop until the
+    connection is closed. The module is not imported by the package itself,
+    import it from streamdeck_sdk.utils.asyncio_dispatcher.
+
+    :param loop: The event loop to use. By default a new one is created with new_event_loop.
+        It is closed once dispatch returns.
+    """
+
+    # Tells StreamDeck.run to call dispatch after run_forever has registered the connection
+    dispatch_after_run_forever = True
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop if loop is not None else new_event_loop()
+        self._corked = False
+        self._reader_fd: Optional[int] = None
+
+    def dispatch(self) -> None:
+        """
+        Runs the event loop until abort is called or the connection is closed,
+        then closes the loop. Returns at once if the connection never opened.
+        """
+        try:
+            if self._reader_fd is not None:
+                self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def abort(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def signal(self, sig: int, callback: Callable) -> None:
+        try:
+            self.loop.add_signal_handler(sig, callback)
+        except (NotImplementedError, RuntimeError, ValueError):
+            # Not available on Windows or outside the main thread;
+            # the signal then interrupts dispatch as usual
+            pass
+
+    def read(self, sock: socket.socket, callback: Callable[[], bool]) -> None:
+        fd = sock.fileno()
+
+        def on_readable() -> None:
+            # A lost connection is torn down (and the socket closed) while the
+            # callback still returns True, so the socket itself is checked too
+            if not callback() or sock.fileno() == -1:
+                self.loop.remove_reader(fd)
+                self._reader_fd = None
+                self.loop.stop()
+
+        self.loop.add_reader(fd, on_readable)
+        self._reader_fd = fd
+
+    def timeout(self, seconds: float, callback: Callable, *args: Any) -> None:
+        """
+        Calls the callback after the given delay, and again after every
+        further delay for as long as it returns True.
+        """
+
+        def on_timeout() -> None:
+            if callback(*args) is True:
+                self.loop.call_later(seconds, on_timeout)
+
+        self.loop.call_soon_threadsafe(self.loop.call_later, seconds, on_timeout)
+
+    def buffwrite(
+            self,
+            sock: socket.socket,
+            data: Union[bytes, str],
+            send: Callable[[socket.socket, Union[bytes, str]], int],
+            disconnect_handler: Callable,
+    ) -> None:
+        self.loop.call_soon_threadsafe(self._write, sock, data, send, disconnect_handler)
+
+    def _write(
+            self,
+            sock: socket.socket,
+            data: Union[bytes, str],
+            send: Callable[[socket.socket, Union[bytes, str]], int],
+            disconnect_handler: Callable,
+    ) -> None:
+        if not self._corked:
+            set_cork(sock, 1)
+            self._corked = True
+            # Runs in the next loop iteration, after the writes queued with this one
+            self.loop.call_soon(self._uncork, sock)
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        view = memoryview(data)
+        try:
+            while view:
+                view = view[send(sock, view):]
+        except Exception as err:
+            logger.error(str(err), exc_info=True)
+            disconnect_handler(err)
+
+    def _uncork(self, sock: socket.socket) -> None:
+        self._corked = False
+        set_cork(sock, 0)
@@ -0,0 +1,128 @@
+import logging
+import socket
+import threading
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+import websocket
+from websocket import ABNF
+
+logger = logging.getLogger(__name__)
+
+_TCP_CORK: Optional[int] = getattr(socket, "TCP_CORK", None)
+
+
+def set_cork(sock: Optional[socket.socket], value: int) -> None:
+    """
+    Corks (1) or uncorks (0) a TCP socket where the platform supports TCP_CORK.
+    While corked, the kernel holds back partial segments so that consecutive
+    small writes leave in as few segments as possible.
+    """
+    if _TCP_CORK is None or sock is None:
+        return
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, _TCP_CORK, value)
+    except OSError:
+        pass
+
+
+class SendBatcher:
+    """
+    Buffers outgoing frames and writes them in bursts.
+
+    A burst is written once max_messages frames are queued or max_delay seconds
+    after the first frame of the burst was queued. Frames are still sent one by one,
+    as the Stream Deck protocol requires, but on Linux the socket is corked for the
+    duration of the burst so that the kernel coalesces them into as few TCP segments
+    as possible.
+
+    :param ws: The connection the frames are written to.
+    :param max_messages: Queue length that triggers an immediate burst.
+    :param max_delay: The longest time in seconds a frame waits in the queue.
+    """
+
+    def __init__(
+            self,
+            ws: websocket.WebSocketApp,
+            *,
+            max_messages: int = 50,
+            max_delay: float = 0.002,
+    ):
+        self.ws = ws
+        self.max_messages = max_messages
+        self.max_delay = max_delay
+
+        self._queue: Deque[Tuple[bytes, int]] = deque()
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="SendBatcher", daemon=True)
+        self._thread.start()
+
+    def put(
+            self,
+            data: bytes,
+            opcode: int = ABNF.OPCODE_TEXT,
+    ) -> None:
+        """
+        Queues a frame. Once the batcher is closed the frame is sent directly.
+        """
+        with self._condition:
+            if self._closed:
+                direct = True
+            else:
+                direct = False
+                self._queue.append((data, opcode))
+                queue_len = len(self._queue)
+                if queue_len == 1 or queue_len >= self.max_messages:
+                    self._condition.notify()
+        if direct:
+            self.ws.send(data, opcode)
+
+    def flush(self) -> None:
+        """
+        Writes all queued frames in the calling thread.
+        """
+        with self._flush_lock:
+            with self._condition:
+                if not self._queue:
+                    return
+                batch, self._queue = self._queue, deque()
+            sock = self._socket()
+            set_cork(sock, 1)
+            try:
+                for data, opcode in batch:
+                    self.ws.send(data, opcode)
+            finally:
+                set_cork(sock, 0)
+
+    def close(self) -> None:
+        """
+        Stops the background thread. Called once the connection is closed,
+        so frames still queued can no longer be written and are dropped.
+        """
+        with self._condition:
+            self._closed = True
+            dropped = len(self._queue)
+            self._queue.clear()
+            self._condition.notify()
+        self._thread.join()
+        if dropped:
+            logger.warning(f"Unsent messages dropped: {dropped}")
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                if len(self._queue) < self.max_messages:
+                    self._condition.wait(self.max_delay)
+            try:
+                self.flush()
+            except Exception as err:
+                logger.error(str(err), exc_info=True)
+
+    def _socket(self) -> Optional[socket.socket]:
+        return getattr(getattr(self.ws, "sock", None), "sock", None)
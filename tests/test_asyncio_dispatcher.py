@@ -0,0 +1,124 @@
+import base64
+import hashlib
+import json
+import socket
+import struct
+import sys
+import threading
+
+from streamdeck_sdk import StreamDeck
+from streamdeck_sdk.utils.asyncio_dispatcher import AsyncioDispatcher
+
+INFO = {
+    "application": {"font": "f", "language": "en", "platform": "mac", "platformVersion": "1", "version": "6"},
+    "plugin": {"uuid": "com.example.plugin", "version": "1"},
+    "devicePixelRatio": 2,
+    "colors": {
+        "buttonPressedBackgroundColor": "#000000",
+        "buttonPressedBorderColor": "#000000",
+        "buttonPressedTextColor": "#000000",
+        "disabledColor": "#000000",
+        "highlightColor": "#000000",
+        "mouseDownColor": "#000000",
+    },
+    "devices": [],
+}
+
+
+def _recv_exact(conn: socket.socket, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            raise EOFError
+        data += chunk
+    return data
+
+
+def _read_frame(conn: socket.socket) -> bytes:
+    header = _recv_exact(conn, 2)
+    length = header[1] & 0x7f
+    if length == 126:
+        length = struct.unpack(">H", _recv_exact(conn, 2))[0]
+    elif length == 127:
+        length = struct.unpack(">Q", _recv_exact(conn, 8))[0]
+    mask = _recv_exact(conn, 4)
+    payload = _recv_exact(conn, length)
+    return bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+
+
+def _accept_then_drop(server: socket.socket, received: list) -> None:
+    """
+    Completes the WebSocket handshake, reads the registration and then
+    closes the TCP connection without sending a close frame.
+    """
+    conn, _ = server.accept()
+    request = b""
+    while b"\r\n\r\n" not in request:
+        request += conn.recv(1024)
+    key = next(
+        line.split(b": ", 1)[1]
+        for line in request.split(b"\r\n")
+        if line.lower().startswith(b"sec-websocket-key")
+    )
+    accept = base64.b64encode(hashlib.sha1(key + b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11").digest())
+    conn.sendall(
+        b"HTTP/1.1 101 Switching Protocols\r\n"
+        b"Upgrade: websocket\r\n"
+        b"Connection: Upgrade\r\n"
+        b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n"
+    )
+    received.append(_read_frame(conn))
+    conn.shutdown(socket.SHUT_RDWR)
+    conn.close()
+
+
+def _start_plugin(monkeypatch, port: int, dispatcher: AsyncioDispatcher) -> threading.Thread:
+    monkeypatch.setattr(sys, "argv", [
+        "plugin",
+        "-port", str(port),
+        "-pluginUUID", "PLUGIN_UUID",
+        "-registerEvent", "registerPlugin",
+        "-info", json.dumps(INFO),
+    ])
+    plugin = StreamDeck()
+    plugin_thread = threading.Thread(
+        target=plugin.run,
+        kwargs={"dispatcher": dispatcher},
+        daemon=True,
+    )
+    plugin_thread.start()
+    return plugin_thread
+
+
+def test_run_returns_when_connection_is_lost(monkeypatch):
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    received = []
+    server_thread = threading.Thread(target=_accept_then_drop, args=(server, received), daemon=True)
+    server_thread.start()
+
+    dispatcher = AsyncioDispatcher()
+    plugin_thread = _start_plugin(monkeypatch, server.getsockname()[1], dispatcher)
+    plugin_thread.join(timeout=5)
+    server.close()
+
+    assert not plugin_thread.is_alive()
+    assert dispatcher.loop.is_closed()
+    assert json.loads(received[0]) == {"event": "registerPlugin", "uuid": "PLUGIN_UUID"}
+
+
+def test_run_returns_when_connection_is_refused(monkeypatch):
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    port = server.getsockname()[1]
+    # Nothing listens on the port any more
+    server.close()
+
+    dispatcher = AsyncioDispatcher()
+    plugin_thread = _start_plugin(monkeypatch, port, dispatcher)
+    plugin_thread.join(timeout=5)
+
+    assert not plugin_thread.is_alive()
+    assert dispatcher.loop.is_closed()
@@ -0,0 +1,79 @@
+import json
+
+from streamdeck_sdk import Action, StreamDeck
+
+KEY_DOWN = {
+    "action": "com.example.action",
+    "event": "keyDown",
+    "context": "CONTEXT",
+    "device": "DEVICE",
+    "payload": {
+        "settings": {},
+        "coordinates": {"column": 0, "row": 0},
+        "state": 0,
+        "userDesiredState": 0,
+        "isInMultiAction": False,
+    },
+}
+
+
+def _plugin_with(action: type) -> StreamDeck:
+    plugin = StreamDeck(actions=[action])
+    plugin._StreamDeck__init_actions()
+    return plugin
+
+
+def test_action_handlers_are_bound_like_attributes():
+    calls = []
+
+    class InstanceAction(Action):
+        UUID = "com.example.action"
+
+        def on_key_down(self, obj):
+            calls.append(("instance", self.context))
+
+    class ClassAction(Action):
+        UUID = "com.example.action"
+
+        @classmethod
+        def on_key_down(cls, obj):
+            calls.append(("class", cls))
+
+    class StaticAction(Action):
+        UUID = "com.example.action"
+
+        @staticmethod
+        def on_key_down(obj):
+            calls.append(("static", obj.context))
+
+    for action in (InstanceAction, ClassAction, StaticAction):
+        _plugin_with(action).ws_on_message(None, json.dumps(KEY_DOWN))
+
+    assert calls == [
+        ("instance", "CONTEXT"),
+        ("class", ClassAction),
+        ("static", "CONTEXT"),
+    ]
+
+
+def test_will_appear_creates_instance_without_handler():
+    class QuietAction(Action):
+        UUID = "com.example.action"
+
+    plugin = _plugin_with(QuietAction)
+    will_appear = {
+        "action": "com.example.action",
+        "event": "willAppear",
+        "context": "CONTEXT",
+        "device": "DEVICE",
+        "payload": {
+            "settings": {},
+            "coordinates": {"column": 0, "row": 0},
+            "state": 0,
+            "isInMultiAction": False,
+            "controller": "Keypad",
+        },
+    }
+    plugin.ws_on_message(None, json.dumps(will_appear))
+
+    assert isinstance(plugin.action_instances["CONTEXT"], QuietAction)
@@ -0,0 +1,71 @@
+import json
+from decimal import Decimal
+from typing import Set
+
+import pydantic
+
+from streamdeck_sdk import Action
+from streamdeck_sdk.pydantic_compat import PYDANTIC_V2
+from streamdeck_sdk.utils import SendBatcher
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, data, opcode):
+        self.sent.append(json.loads(data))
+
+
+class SendingAction(Action):
+    UUID = "com.example.action"
+    plugin_uuid = "PLUGIN_UUID"
+
+
+def test_non_str_payload_keys_are_coerced(monkeypatch):
+    ws = FakeWebSocket()
+    monkeypatch.setattr(SendingAction, "ws", ws)
+    action = SendingAction("CONTEXT")
+
+    action.set_settings({1: "one"})
+    action.set_global_settings({2: "two"})
+    action.send_to_property_inspector({3: "three"})
+    action.send({"event": "custom", "payload": {4: "four"}})
+
+    assert [message["payload"] for message in ws.sent] == [
+        {"1": "one"},
+        {"2": "two"},
+        {"3": "three"},
+        {"4": "four"},
+    ]
+
+
+def test_batcher_sends_directly_once_closed():
+    ws = FakeWebSocket()
+    batcher = SendBatcher(ws)
+    batcher.close()
+
+    batcher.put(b'{"event": "late"}')
+
+    assert ws.sent == [{"event": "late"}]
+
+
+class ExtraPayload(pydantic.BaseModel):
+    tags: Set[str]
+    price: Decimal
+    my_field: int = pydantic.Field(alias="myField")
+
+
+def test_models_are_encoded_like_pydantic_json(monkeypatch):
+    ws = FakeWebSocket()
+    monkeypatch.setattr(SendingAction, "ws", ws)
+    action = SendingAction("CONTEXT")
+    payload = ExtraPayload(tags={"a"}, price=Decimal("1.5"), myField=1)
+
+    action.send(payload)
+    action.set_title(payload)
+
+    expected = json.loads(payload.model_dump_json() if PYDANTIC_V2 else payload.json())
+    assert expected["tags"] == ["a"] and "my_field" in expected
+    assert ws.sent[0] == expected
+    assert ws.sent[1]["payload"] == ws.sent[0]